@@ -4,9 +4,10 @@
 
 import os
 from dotenv import load_dotenv
-from util.transformer import transform_to_json, expand_job_description
-from util.mapper import generate_mappings
+from util.transformer import transform_to_json, expand_job_description, validate_against_schema, format_validation_report
+from util.mapper import generate_mappings, get_reasoning_for_match
 from util.composer import generate_letter
+from util.job_repository import JobArtifactRepository, content_hash
 import json
 import argparse
 
@@ -35,6 +36,17 @@ def get_data_status(raw_dir: str, temp_path: str, final_path: str) -> str:
     else:
         return "Missing"
 
+def get_optional_int_env(name: str) -> int | None:
+    """Reads an optional positive integer setting from the environment."""
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Warning: Ignoring non-integer value '{value}' for {name}.")
+        return None
+
 def select_file_from_dir(directory: str, prompt_message: str, extensions: tuple) -> str | None:
     """Scans a directory for specific file types, lists them, and asks the user to select one."""
     files = get_files_in_dir(directory, extensions)
@@ -90,10 +102,14 @@ def run_sanitization():
     if job_raw_path:
         print(f"Sanitizing '{os.path.basename(job_raw_path)}'...")
         try:
-            if job_raw_path.lower().endswith('.html'):
-                content = sanitize_html_to_markdown(job_raw_path)
-            elif job_raw_path.lower().endswith('.pdf'):
-                content = sanitize_pdf_to_markdown(job_raw_path)
+            if not job_raw_path.lower().endswith('.md'):
+                # Postings are shared across candidates, so sanitize each one only once.
+                with open(job_raw_path, 'rb') as f:
+                    raw_key = content_hash(f.read())
+                sanitize = sanitize_html_to_markdown if job_raw_path.lower().endswith('.html') else sanitize_pdf_to_markdown
+                content = JobArtifactRepository().get_or_create(
+                    "sanitized_markdown", raw_key, lambda: sanitize(job_raw_path).encode('utf-8')
+                ).decode('utf-8')
             else: # .md
                 # If it's already a markdown file, just copy it
                 import shutil
@@ -153,9 +169,19 @@ def run_transformation():
                 job_text = f.read()
             with open(job_schema_path, 'r', encoding='utf-8') as f:
                 job_schema = json.load(f)
+            with open(transform_prompt_file, 'r', encoding='utf-8') as f:
+                transform_prompt = f.read()
 
             print("Transforming job data with LLM...")
-            job_json = transform_to_json(job_text, job_schema, transform_prompt_file)
+            job_repository = JobArtifactRepository()
+            job_key = content_hash(job_text, json.dumps(job_schema, sort_keys=True), transform_prompt)
+            job_json = json.loads(job_repository.get_or_create(
+                "job_json", job_key,
+                lambda: json.dumps(transform_to_json(job_text, job_schema, transform_prompt_file)).encode('utf-8')
+            ))
+            if validate_against_schema(job_json, job_schema):
+                # Don't share a result that failed validation; the next run retries it.
+                job_repository.discard("job_json", job_key)
 
             with open(job_json_path, 'w', encoding='utf-8') as f:
                 json.dump(job_json, f, indent=4)
@@ -186,9 +212,14 @@ def run_expansion():
     try:
         with open(job_md_path, 'r', encoding='utf-8') as f:
             job_text = f.read()
+        with open(expand_prompt_file, 'r', encoding='utf-8') as f:
+            expand_prompt = f.read()
 
         print("Expanding job description with LLM...")
-        expanded_text = expand_job_description(job_text, expand_prompt_file)
+        expanded_text = JobArtifactRepository().get_or_create(
+            "expanded_markdown", content_hash(job_text, expand_prompt),
+            lambda: expand_job_description(job_text, expand_prompt_file).encode('utf-8')
+        ).decode('utf-8')
 
         with open(expanded_job_md_path, 'w', encoding='utf-8') as f:
             f.write(expanded_text)
@@ -209,13 +240,34 @@ def run_mapping_generation():
     job_data_path = "data/job_data.json"
     mappings_output_path = "data/mappings.json"
     reasoning_prompt_path = "prompts/reasoning_prompt.txt"
+    template_path = "templates/letter_template.md"
 
     if not all(os.path.exists(p) for p in [personal_data_path, job_data_path]):
         print("Error: Both 'personal_data.json' and 'job_data.json' must exist to generate mappings.")
         print("Please run the Sanitization and Transformation stages first.")
         return
-        
-    generate_mappings(personal_data_path, job_data_path, mappings_output_path, reasoning_prompt_path)
+
+    # Surface schema problems before they silently produce empty mappings.
+    for data_path, schema_path in [(personal_data_path, "data/schemas/personal_data_schema.json"),
+                                   (job_data_path, "data/schemas/job_data_schema.json")]:
+        if not os.path.exists(schema_path):
+            continue
+        with open(data_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with open(schema_path, 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        report = validate_against_schema(data, schema)
+        if report:
+            print(f"Warning: '{data_path}' does not match its schema. Mappings may be incomplete:")
+            print(format_validation_report(report))
+            print("Re-run Transformation or fix the file using the manual override options.")
+
+    # Reasoning is planned from the letter template; the budget is optional and set via .env
+    generate_mappings(personal_data_path, job_data_path, mappings_output_path, reasoning_prompt_path,
+                      artifact_repository=JobArtifactRepository(),
+                      template_path=template_path,
+                      max_reasoning_calls=get_optional_int_env("REASONING_MAX_CALLS"),
+                      max_reasoning_tokens=get_optional_int_env("REASONING_MAX_TOKENS"))
 
 
 def run_composition():
@@ -228,6 +280,7 @@ def run_composition():
     job_data_path = "data/job_data.json"
     template_path = "templates/letter_template.md"
     output_path = "deliverables/motivation_letter.md"
+    reasoning_prompt_path = "prompts/reasoning_prompt.txt"
 
     if not all(os.path.exists(p) for p in [mappings_path, personal_data_path, job_data_path]):
         print("Error: Not all required data files exist. Please run previous stages first.")
@@ -235,7 +288,11 @@ def run_composition():
 
     try:
         # Generate the letter
-        letter_content = generate_letter(template_path, mappings_path, personal_data_path, job_data_path)
+        # Reasoning skipped during mapping is generated here, only for the matches the letter uses
+        letter_content = generate_letter(
+            template_path, mappings_path, personal_data_path, job_data_path,
+            reasoning_provider=lambda requirement, experience: get_reasoning_for_match(requirement, experience, reasoning_prompt_path)
+        )
         
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(letter_content)
@@ -4,16 +4,62 @@
 import json
 from jinja2 import Environment, FileSystemLoader
 import os
+from typing import Callable
 
-def generate_letter(template_path: str, mappings_path: str, personal_data_path: str, job_data_path: str) -> str:
+class TrackedMatch(dict):
+    """
+    A mapping entry that reports each time the template reads its 'reasoning'.
+
+    Jinja2 resolves `match.reasoning` through item access, so this lets the caller see
+    exactly which entries a template consumes and decide what value they get.
+    """
+
+    def __init__(self, match: dict, requirement: str, index: int, on_reasoning: Callable[['TrackedMatch'], str]):
+        super().__init__(match)
+        self.requirement = requirement
+        self.index = index
+        self.on_reasoning = on_reasoning
+
+    def __getitem__(self, key):
+        if key == "reasoning":
+            return self.on_reasoning(self)
+        return super().__getitem__(key)
+
+def track_mappings(mappings: dict, on_reasoning: Callable[[TrackedMatch], str]) -> dict:
+    """Wraps every mapping entry in a TrackedMatch that calls `on_reasoning` when read."""
+    return {
+        requirement: [TrackedMatch(match, requirement, i, on_reasoning) for i, match in enumerate(matches)]
+        for requirement, matches in mappings.items()
+    }
+
+def render_letter(template_path: str, mappings: dict, personal_data: dict, job_data: dict) -> str:
+    """Renders the letter template with already loaded data."""
+    template_dir = os.path.dirname(template_path)
+    template_filename = os.path.basename(template_path)
+    env = Environment(loader=FileSystemLoader(template_dir))
+    template = env.get_template(template_filename)
+
+    return template.render(
+        personal_data=personal_data,
+        job_details=job_data.get("jobDetails", {}),
+        mappings=mappings
+    )
+
+def generate_letter(template_path: str, mappings_path: str, personal_data_path: str, job_data_path: str,
+                    reasoning_provider: Callable[[str, dict], str] | None = None) -> str:
     """
     Generates a motivation letter from a template and structured data.
 
+    Mapping entries whose reasoning was not generated during mapping are filled on demand
+    when the template reads them, and the filled-in reasoning is saved back to mappings.json.
+
     Args:
         template_path: The path to the Jinja2 template file.
         mappings_path: The path to the mappings.json file.
         personal_data_path: The path to the personal_data.json file.
         job_data_path: The path to the job_data.json file.
+        reasoning_provider: A function (requirement, experience) -> reasoning used to fill
+            missing reasoning on demand.
 
     Returns:
         A string containing the composed motivation letter.
@@ -28,17 +74,26 @@ def generate_letter(template_path: str, mappings_path: str, personal_data_path:
     except FileNotFoundError as e:
         raise FileNotFoundError(f"Error: Could not find a required data file. {e.filename}")
 
-    # Set up the Jinja2 environment
-    template_dir = os.path.dirname(template_path)
-    template_filename = os.path.basename(template_path)
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template(template_filename)
+    filled = []
+
+    def fill_reasoning(match: TrackedMatch) -> str:
+        reasoning = match.get("reasoning")
+        if reasoning is None:
+            if reasoning_provider is None:
+                return ""
+            print(f"Generating missing reasoning for '{match.requirement}'...")
+            reasoning = reasoning_provider(match.requirement, match["experience"])
+            mappings[match.requirement][match.index]["reasoning"] = reasoning
+            filled.append(match)
+            dict.__setitem__(match, "reasoning", reasoning)
+        return reasoning
 
     # Render the template with the loaded data
-    composed_letter = template.render(
-        personal_data=personal_data,
-        job_details=job_data.get("jobDetails", {}),
-        mappings=mappings
-    )
+    composed_letter = render_letter(template_path, track_mappings(mappings, fill_reasoning), personal_data, job_data)
+
+    if filled:
+        with open(mappings_path, 'w', encoding='utf-8') as f:
+            json.dump(mappings, f, indent=4)
+        print(f"Saved {len(filled)} on-demand reasoning statement(s) to '{mappings_path}'.")
 
-    return composed_letter 
\ No newline at end of file
+    return composed_letter
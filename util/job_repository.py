@@ -0,0 +1,141 @@
+# util/job_repository.py
+# This module provides a shared, read-mostly store for job-side artifacts so that a posting
+# targeted by many candidates is sanitized, expanded, transformed and embedded only once.
+
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+DEFAULT_DB_PATH = "data/job_artifacts.db"
+
+def content_hash(*parts: str | bytes) -> str:
+    """Returns a SHA-256 hex digest over the given parts, used as the artifact key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+class JobArtifactRepository:
+    """
+    A SQLite-backed repository of job artifacts, keyed by artifact kind and content hash.
+
+    The database runs in WAL mode so that concurrent pipeline runs can read while another
+    run writes. Before computing an artifact, a run claims its key with a 'pending' row;
+    other runs that need the same artifact wait for the claim to be fulfilled instead of
+    repeating the work.
+    """
+
+    def __init__(self, db_path: str | None = None, wait_timeout: float = 900.0, poll_interval: float = 1.0):
+        """
+        Args:
+            db_path: Path to the SQLite database. Defaults to the JOB_ARTIFACT_DB environment
+                variable, or 'data/job_artifacts.db' if it is not set.
+            wait_timeout: Seconds to wait for another run's pending claim before taking it over.
+            poll_interval: Seconds between checks while waiting on a pending claim.
+        """
+        self.db_path = db_path or os.getenv("JOB_ARTIFACT_DB", DEFAULT_DB_PATH)
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    value BLOB,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Opens a connection that commits on success and is always closed afterwards."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, kind: str, key: str) -> bytes | None:
+        """Returns a stored artifact, or None if it is missing or still being computed."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM artifacts WHERE kind = ? AND key = ? AND status = 'ready'",
+                (kind, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, kind: str, key: str, value: bytes):
+        """Stores an artifact, replacing any existing entry or pending claim."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts (kind, key, status, value, updated_at) VALUES (?, ?, 'ready', ?, ?)",
+                (kind, key, value, time.time())
+            )
+
+    def discard(self, kind: str, key: str):
+        """Removes an artifact so that the next run recomputes it."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM artifacts WHERE kind = ? AND key = ?", (kind, key))
+
+    def _claim(self, kind: str, key: str) -> bool:
+        """Tries to claim a key for computation. Stale claims from crashed runs are taken over."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM artifacts WHERE kind = ? AND key = ? AND status = 'pending' AND updated_at < ?",
+                (kind, key, now - self.wait_timeout)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO artifacts (kind, key, status, value, updated_at) VALUES (?, ?, 'pending', NULL, ?)",
+                (kind, key, now)
+            )
+            return cursor.rowcount == 1
+
+    def get_or_create(self, kind: str, key: str, create: Callable[[], bytes]) -> bytes:
+        """
+        Returns the artifact for a key, computing it with `create` only if no run has done so yet.
+
+        Args:
+            kind: The artifact type (e.g. 'expanded_markdown', 'job_json').
+            key: The content hash of the artifact's inputs.
+            create: A function that computes the artifact as bytes.
+
+        Returns:
+            The stored or freshly computed artifact.
+        """
+        waiting = False
+        while True:
+            value = self.get(kind, key)
+            if value is not None:
+                print(f"Reusing shared job artifact '{kind}' ({key[:12]}).")
+                return value
+
+            if self._claim(kind, key):
+                try:
+                    value = create()
+                except BaseException:
+                    self.discard(kind, key)
+                    raise
+                self.put(kind, key, value)
+                return value
+
+            if not waiting:
+                print(f"Waiting for another run to finish computing '{kind}' ({key[:12]})...")
+                waiting = True
+            time.sleep(self.poll_interval)
@@ -1,13 +1,29 @@
 # util/mapper.py
 # This module performs the semantic mapping between the applicant's profile and the job data.
 
+import io
 import json
 from sentence_transformers import SentenceTransformer, util
 import torch
 from openai import OpenAI
+from util.job_repository import JobArtifactRepository, content_hash
+from util.planner import find_consumed_matches, apply_budget
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+REASONING_MAX_TOKENS = 150
 
 client = OpenAI()
 
+def build_reasoning_user_prompt(requirement: str, experience: dict) -> str:
+    """Builds the user prompt sent to the LLM when reasoning about a single match."""
+    experience_text = experience.get('text', 'N/A')
+    return f"Job Requirement: \"{requirement}\"\nCandidate Experience: \"{experience_text}\""
+
+def estimate_reasoning_tokens(system_prompt: str, requirement: str, experience: dict) -> int:
+    """Roughly estimates the tokens one reasoning call costs (about 4 characters per prompt token plus the completion limit)."""
+    prompt_chars = len(system_prompt) + len(build_reasoning_user_prompt(requirement, experience))
+    return prompt_chars // 4 + REASONING_MAX_TOKENS
+
 def get_reasoning_for_match(requirement: str, experience: dict, prompt_file: str) -> str:
     """Uses an LLM to generate a causal reasoning statement for a match."""
     try:
@@ -16,8 +32,7 @@ def get_reasoning_for_match(requirement: str, experience: dict, prompt_file: str
     except FileNotFoundError:
         return "Error: Reasoning prompt file not found."
 
-    experience_text = experience.get('text', 'N/A')
-    user_prompt = f"Job Requirement: \"{requirement}\"\nCandidate Experience: \"{experience_text}\""
+    user_prompt = build_reasoning_user_prompt(requirement, experience)
 
     try:
         completion = client.chat.completions.create(
@@ -27,23 +42,47 @@ def get_reasoning_for_match(requirement: str, experience: dict, prompt_file: str
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.5,
-            max_tokens=150
+            max_tokens=REASONING_MAX_TOKENS
         )
         reasoning = completion.choices[0].message.content.strip()
         return reasoning
     except Exception as e:
         return f"Error generating reasoning: {e}"
 
-def generate_mappings(personal_data_path: str, job_data_path: str, mappings_output_path: str, reasoning_prompt_path: str):
+def encode_requirements(model: SentenceTransformer, requirements_corpus: list[str], artifact_repository: JobArtifactRepository | None = None) -> torch.Tensor:
+    """Encodes job requirements, reusing embeddings shared by other runs for the same posting when possible."""
+    if artifact_repository is None:
+        return model.encode(requirements_corpus, convert_to_tensor=True)
+
+    def create() -> bytes:
+        buffer = io.BytesIO()
+        torch.save(model.encode(requirements_corpus, convert_to_tensor=True).cpu(), buffer)
+        return buffer.getvalue()
+
+    key = content_hash(EMBEDDING_MODEL_NAME, *requirements_corpus)
+    serialized = artifact_repository.get_or_create("requirement_embeddings", key, create)
+    return torch.load(io.BytesIO(serialized), map_location=model.device)
+
+def generate_mappings(personal_data_path: str, job_data_path: str, mappings_output_path: str, reasoning_prompt_path: str,
+                      artifact_repository: JobArtifactRepository | None = None, template_path: str | None = None,
+                      max_reasoning_calls: int | None = None, max_reasoning_tokens: int | None = None):
     """
     Compares personal and job data to find semantic matches and saves them.
     This version captures all potential matches for later processing.
 
+    Reasoning is only generated up front for the matches the letter template will read,
+    within the optional call/token budget. The remaining matches are saved with a null
+    reasoning, which the composer fills on demand if the letter ends up needing it.
+
     Args:
         personal_data_path: Path to the applicant's structured data.
         job_data_path: Path to the job's structured data.
         mappings_output_path: Path to save the resulting mappings.
         reasoning_prompt_path: Path to the reasoning prompt file.
+        artifact_repository: Optional shared job artifact repository used to reuse requirement embeddings.
+        template_path: Path to the letter template used to plan reasoning. If None, every match gets reasoning.
+        max_reasoning_calls: Maximum number of reasoning calls to make up front, or None for no limit.
+        max_reasoning_tokens: Maximum estimated tokens to spend on reasoning up front, or None for no limit.
     """
     print("Loading data for mapping...")
     try:
@@ -56,7 +95,7 @@ def generate_mappings(personal_data_path: str, job_data_path: str, mappings_outp
         return
 
     print("Initializing sentence transformer model...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
 
     # --- Create a flattened corpus of the user's experiences and skills ---
     experience_corpus = []
@@ -102,7 +141,7 @@ def generate_mappings(personal_data_path: str, job_data_path: str, mappings_outp
         print("Warning: No job requirements found to map to.")
         return
         
-    requirement_embeddings = model.encode(requirements_corpus, convert_to_tensor=True)
+    requirement_embeddings = encode_requirements(model, requirements_corpus, artifact_repository)
 
     # --- Compute semantic similarity and find matches ---
     print("Computing semantic similarities...")
@@ -116,19 +155,41 @@ def generate_mappings(personal_data_path: str, job_data_path: str, mappings_outp
         matches = []
         for score, idx in zip(scores, indices):
             matched_experience = experience_corpus[idx]
-            
-            # Generate reasoning for this specific match
-            reasoning = get_reasoning_for_match(req, experience_map[matched_experience], reasoning_prompt_path)
-
             matches.append({
                 "experience": experience_map[matched_experience],
                 "similarity": f"{score.item():.2f}",
-                "reasoning": reasoning
+                "reasoning": None
             })
         
         if matches:
             mappings[req] = matches
-            
+
+    # --- Plan which matches need reasoning now ---
+    all_entries = [(req, i) for req, matches in mappings.items() for i in range(len(matches))]
+    planned_entries = None
+    if template_path:
+        planned_entries = find_consumed_matches(template_path, mappings, personal_data, job_data)
+    if planned_entries is None:
+        planned_entries = all_entries
+
+    try:
+        with open(reasoning_prompt_path, 'r', encoding='utf-8') as f:
+            reasoning_system_prompt = f.read()
+    except FileNotFoundError:
+        reasoning_system_prompt = ""
+    planned_entries = apply_budget(
+        planned_entries,
+        lambda req, i: estimate_reasoning_tokens(reasoning_system_prompt, req, mappings[req][i]["experience"]),
+        max_calls=max_reasoning_calls,
+        max_tokens=max_reasoning_tokens
+    )
+
+    print(f"Generating reasoning for {len(planned_entries)} of {len(all_entries)} matches "
+          f"(the rest will be generated on demand during composition)...")
+    for req, i in planned_entries:
+        # Generate reasoning for this specific match
+        mappings[req][i]["reasoning"] = get_reasoning_for_match(req, mappings[req][i]["experience"], reasoning_prompt_path)
+
     # --- Save the mappings ---
     try:
         with open(mappings_output_path, 'w', encoding='utf-8') as f:
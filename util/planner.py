@@ -0,0 +1,68 @@
+# util/planner.py
+# This module plans which mapping entries need LLM reasoning, based on what the letter template consumes.
+
+from typing import Callable
+from util.composer import TrackedMatch, render_letter, track_mappings
+
+def find_consumed_matches(template_path: str, mappings: dict, personal_data: dict, job_data: dict) -> list[tuple[str, int]] | None:
+    """
+    Determines which mapping entries the letter template will actually read reasoning from.
+
+    The template is rendered once with placeholder reasoning, and every entry whose
+    reasoning is accessed is recorded. Because the template's own loop logic decides
+    what is read (e.g. only the first unused match per requirement), the result follows
+    whatever template is chosen.
+
+    Args:
+        template_path: The path to the Jinja2 letter template.
+        mappings: The mapping entries, without reasoning.
+        personal_data: The applicant's structured data.
+        job_data: The job's structured data.
+
+    Returns:
+        The consumed entries as (requirement, match index) pairs in the order the template
+        reads them, or None if the template could not be rendered.
+    """
+    consumed = []
+
+    def record(match: TrackedMatch) -> str:
+        entry = (match.requirement, match.index)
+        if entry not in consumed:
+            consumed.append(entry)
+        return ""
+
+    try:
+        render_letter(template_path, track_mappings(mappings, record), personal_data, job_data)
+    except Exception as e:
+        print(f"Warning: Could not analyze the letter template ({e}).")
+        return None
+
+    return consumed
+
+def apply_budget(entries: list[tuple[str, int]], estimate_tokens: Callable[[str, int], int],
+                 max_calls: int | None = None, max_tokens: int | None = None) -> list[tuple[str, int]]:
+    """
+    Trims a list of planned reasoning calls to fit a call and/or token budget.
+
+    Entries are kept in order, so the ones the letter reads first are generated first.
+
+    Args:
+        entries: The planned (requirement, match index) pairs.
+        estimate_tokens: A function returning the estimated token cost of one entry.
+        max_calls: The maximum number of reasoning calls, or None for no limit.
+        max_tokens: The maximum total estimated tokens, or None for no limit.
+
+    Returns:
+        The entries that fit within the budget.
+    """
+    selected = []
+    spent_tokens = 0
+    for requirement, index in entries:
+        if max_calls is not None and len(selected) >= max_calls:
+            break
+        cost = estimate_tokens(requirement, index)
+        if max_tokens is not None and spent_tokens + cost > max_tokens:
+            break
+        selected.append((requirement, index))
+        spent_tokens += cost
+    return selected
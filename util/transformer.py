@@ -3,6 +3,7 @@
 
 import os
 import json
+from jsonschema import Draft7Validator
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -23,15 +24,121 @@ def load_prompt_from_file(prompt_file_path: str) -> str:
     except FileNotFoundError:
         raise FileNotFoundError(f"Prompt file not found at: {prompt_file_path}")
 
-def transform_to_json(source_text: str, schema: dict, prompt_file: str) -> dict:
+def request_json_completion(system_prompt: str, user_prompt: str) -> dict:
+    """Sends a prompt pair to the LLM in JSON mode and returns the parsed response."""
+    try:
+        completion = client.chat.completions.create(
+            model="gpt-4o",
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        response_content = completion.choices[0].message.content
+        print("Successfully received and parsed response from API.")
+        return json.loads(response_content)
+
+    except Exception as e:
+        print(f"An error occurred while communicating with the OpenAI API: {e}")
+        raise
+
+def validate_against_schema(data: dict, schema: dict) -> dict[str, list[str]]:
+    """
+    Validates transformed data against its JSON schema and groups the errors by top-level section.
+
+    Args:
+        data: The structured data returned by the transformation.
+        schema: The JSON schema the data should conform to.
+
+    Returns:
+        A dictionary mapping each failing top-level section to a list of
+        human-readable error messages. An empty dictionary means the data is valid.
+    """
+    if not isinstance(data, dict):
+        return {"(root)": [f"Expected a JSON object, got {type(data).__name__}."]}
+
+    report = {}
+    for section in schema.get("required", []):
+        if section not in data:
+            report.setdefault(section, []).append("Section is missing.")
+
+    for error in Draft7Validator(schema).iter_errors(data):
+        if error.validator == "required" and not error.absolute_path:
+            continue  # Missing sections are already reported above.
+        path = list(error.absolute_path)
+        section = str(path[0]) if path else "(root)"
+        location = "/".join(str(p) for p in path) or "(root)"
+        report.setdefault(section, []).append(f"{location}: {error.message}")
+
+    return report
+
+def format_validation_report(report: dict[str, list[str]]) -> str:
+    """Formats a validation report as an indented, per-field listing for the console."""
+    lines = []
+    for section, errors in report.items():
+        lines.append(f"  - {section}:")
+        lines.extend(f"      {error}" for error in errors)
+    return "\n".join(lines)
+
+def transform_section(source_text: str, section: str, schema: dict, prompt_file: str, errors: list[str]) -> dict:
+    """
+    Re-transforms a single top-level section of the schema, leaving the rest of the document untouched.
+
+    Args:
+        source_text: The sanitized text content to be transformed.
+        section: The name of the top-level schema property to extract.
+        schema: The full JSON schema; only the section's sub-schema is sent to the LLM.
+        prompt_file: The path to the file containing the system prompt.
+        errors: The validation errors reported for the previous attempt at this section.
+
+    Returns:
+        A dictionary containing only the re-transformed section (empty if the LLM omitted it).
+    """
+    section_schema = {
+        "type": "object",
+        "properties": {section: schema.get("properties", {}).get(section, {})},
+        "required": [section]
+    }
+    if "definitions" in schema:
+        section_schema["definitions"] = schema["definitions"]
+
+    system_prompt_template = load_prompt_from_file(prompt_file)
+    system_prompt = system_prompt_template + f"\n\nJSON Schema:\n{json.dumps(section_schema, indent=2)}"
+
+    error_list = "\n".join(f"- {error}" for error in errors)
+    user_prompt = f"""
+    A previous transformation of the text below produced an invalid "{section}" section.
+    Please extract ONLY the "{section}" section and return it as a JSON object with "{section}" as its single top-level key.
+
+    Problems with the previous attempt:
+    {error_list}
+
+    Text to parse:
+    ---
+    {source_text}
+    ---
+    """
+
+    print(f"Requesting re-transformation of section '{section}' from OpenAI API...")
+    response = request_json_completion(system_prompt, user_prompt)
+    return {section: response[section]} if section in response else {}
+
+def transform_to_json(source_text: str, schema: dict, prompt_file: str, max_repair_attempts: int = 2) -> dict:
     """
     Transforms unstructured text into a structured JSON object using an LLM,
     guided by a schema and an external prompt file.
 
+    The result is validated against the schema. Sections that fail validation are
+    re-transformed individually, reusing the valid parts of the first response, until
+    they pass or the repair attempts are exhausted. Any remaining errors are printed
+    as a per-field report.
+
     Args:
         source_text: The sanitized text content to be transformed.
         schema: The JSON schema to guide the transformation.
         prompt_file: The path to the file containing the system prompt.
+        max_repair_attempts: How many times failing sections are re-transformed.
 
     Returns:
         A dictionary containing the structured data.
@@ -50,22 +157,27 @@ def transform_to_json(source_text: str, schema: dict, prompt_file: str) -> dict:
     """
 
     print("Requesting transformation from OpenAI API...")
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        response_content = completion.choices[0].message.content
-        print("Successfully received and parsed response from API.")
-        return json.loads(response_content)
-
-    except Exception as e:
-        print(f"An error occurred while communicating with the OpenAI API: {e}")
-        raise
+    data = request_json_completion(system_prompt, user_prompt)
+
+    report = validate_against_schema(data, schema)
+    for attempt in range(1, max_repair_attempts + 1):
+        # Only named schema sections can be re-transformed on their own.
+        failing_sections = [s for s in report if s in schema.get("properties", {})]
+        if not isinstance(data, dict) or not failing_sections:
+            break
+        print(f"Validation found problems in {len(failing_sections)} section(s) (repair attempt {attempt}/{max_repair_attempts}):")
+        print(format_validation_report({s: report[s] for s in failing_sections}))
+        for section in failing_sections:
+            data.update(transform_section(source_text, section, schema, prompt_file, report[section]))
+        report = validate_against_schema(data, schema)
+
+    if report:
+        print("Warning: The transformed data still does not match the schema:")
+        print(format_validation_report(report))
+    else:
+        print("Transformed data is valid against the schema.")
+
+    return data
 
 def expand_job_description(source_text: str, prompt_file: str) -> str:
     """